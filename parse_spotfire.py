@@ -1,90 +1,593 @@
 #!/usr/bin/env python3
 import os
+import io
+import re
+import sys
 import zipfile
-import tempfile
 import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from lxml import etree as ET
 
+try:
+    import orjson
+except ImportError:  # optional: falls back to the (slower) stdlib json
+    orjson = None
+
 # (1) Directories (inside container)
 INPUT_DIR = "dxp_input"
 OUTPUT_DIR = "im_output"
+# XML library for the lookup pass: "lxml" (default) or "pugixml" (needs pygixml)
+PARSE_BACKEND = os.environ.get("PARSE_BACKEND", "lxml")
+# Worker pool for batch runs: "process" (default) or "thread"
+PARSE_EXECUTOR = os.environ.get("PARSE_EXECUTOR", "process")
+# Parser options for every parse of the document: no size limits, no
+# entity/network resolution, and blank text dropped
+_PARSER_OPTIONS = dict(huge_tree=True, remove_blank_text=True, resolve_entities=False,
+                       no_network=True)
 
 # (2) Spotfire namespace (adjust if needed)
 NS = {"sf": "http://www.spotfire.com/schemas/Document1.0.xsd"}
+# The namespace is stripped before parsing (see strip_namespace), so tags and
+# queries below use plain local names
+_NS_DECL = re.compile(rb"""\sxmlns=["']%s["']""" % re.escape(NS["sf"].encode()))
+# Start tag of the document element: the first tag that is not an XML
+# declaration, processing instruction, comment or DOCTYPE
+_ROOT_START = re.compile(rb"<[^?!][^>]*>")
+SF_OBJECT = "Object"
+SF_ARRAY_TAGS = {"Array", "MultiDimensionalArray"}
+
+# Child-axis queries used on every parsed element, compiled once
+_X_TYPE = ET.XPath("Type")
+_X_TYPEREF = ET.XPath("TypeRef")
+_X_TYPEOBJ = ET.XPath("TypeObject")
+_X_FIELDS_CONTAINER = ET.XPath("Fields")
+_X_FIELD = ET.XPath("Field")
+_X_OBJECT = ET.XPath("Object")
+_X_ELEMENTS = ET.XPath("Elements")
+# Id of an object's type: its TypeRef target, or its inline TypeObject
+_X_TYPE_ID = ET.XPath("string(Type/TypeRef/@Value | Type/TypeObject/@Id)", smart_strings=False)
+
+
+def _field_objects(name):
+    """
+    XPath steps to the <sf:Object> values of field `name`, bare or in an array.
+    Like parse_object, only the last such field of the first <sf:Fields> counts.
+    """
+    field = f"Fields[1]/Field[@Name='{name}'][last()]"
+    return [f"{field}/Object"] + [
+        f"{field}[count(*)=1]/{a}[not(@Value)]/Elements[1]/Object"
+        for a in ("Array", "MultiDimensionalArray")
+    ]
+
+
+# True if the object's TypeRef/TypeObject Id is in the space-delimited $ids
+_HAS_TYPE = "[contains(${0}, concat(' ', Type/TypeRef/@Value | Type/TypeObject/@Id, ' '))]"
+
+# Every DataColumn of a DataTable, in document order: DataColumn objects
+# listed directly under Columns (older format) and the Items -> Nodes of a
+# DataColumnCollection (newer format)
+_X_DATACOLUMNS = ET.XPath(" | ".join(
+    [c + _HAS_TYPE.format("column_ids") for c in _field_objects("Columns")]
+    + [
+        c + _HAS_TYPE.format("collection_ids") + "/" + i + "/" + n
+        for c in _field_objects("Columns")
+        for i in _field_objects("Items")
+        for n in _field_objects("Nodes")
+    ]
+))
+# Value attribute of a field holding a single value element, e.g. <String Value=".."/>
+_X_FIELD_VALUE = ET.XPath("Fields[1]/Field[@Name=$n][last()][count(*)=1]/*/@Value",
+                          smart_strings=False)
+_X_FIELD_BY_NAME = ET.XPath("Fields[1]/Field[@Name=$n][last()]")
+
+# Id -> value pairs for the lookup tables, read as parallel attribute lists;
+# the predicates keep both lists aligned
+_X_TYPE_IDS = ET.XPath(".//TypeObject[@FullTypeName]/@Id", smart_strings=False)
+_X_TYPE_NAMES = ET.XPath(".//TypeObject[@Id]/@FullTypeName", smart_strings=False)
+_X_STRING_IDS = ET.XPath(".//String[@Value]/@Id", smart_strings=False)
+_X_STRING_VALUES = ET.XPath(".//String[@Id]/@Value", smart_strings=False)
+_X_EMPTY_STRING_IDS = ET.XPath(".//String[not(@Value)]/@Id", smart_strings=False)
+
+@dataclass
+class ParsedObj:
+    """
+    A parsed <sf:Object>. Slotted to keep the many nested records small;
+    the attribute names are the IM keys, so orjson writes it as a dict.
+    """
+    __slots__ = ("Id", "Type", "Fields", "Children")
+    Id: str
+    Type: str
+    Fields: dict
+    Children: list
+
+
+def _json_default(obj):
+    """json.dump() hook for ParsedObj when orjson is not installed."""
+    if isinstance(obj, ParsedObj):
+        return {"Id": obj.Id, "Type": obj.Type, "Fields": obj.Fields, "Children": obj.Children}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
-def parse_field_value(fld, type_lookup):
-    """Return a Python representation of a <sf:Field> value."""
-    nested = fld.findall("sf:Object", NS)
+# Field shapes, see _classify()
+SHAPE_EMPTY, SHAPE_VALUE, SHAPE_ARRAY, SHAPE_NESTED, SHAPE_MULTI = range(5)
+
+
+def _classify(fld):
+    """
+    Return (shape, children) for a <sf:Field> in one pass over its children.
+    For SHAPE_NESTED the children are the nested <sf:Object> nodes only.
+    """
+    nested = []
+    children = []
+    for c in fld:
+        (nested if c.tag == SF_OBJECT else children).append(c)
     if nested:
-        return [parse_object(n, type_lookup) for n in nested]
-
-    children = list(fld)
-    if children:
-        # <Field><String Value=".."/></Field> etc.
-        if len(children) == 1:
-            child = children[0]
-            val = child.attrib.get("Value")
-            if val is not None:
-                return val
-            if child.tag.endswith("Array"):
-                elems = child.find("sf:Elements", NS)
-                if elems is not None:
-                    return [parse_object(o, type_lookup) for o in elems.findall("sf:Object", NS)]
-                return [c.attrib.get("Value", (c.text or "").strip()) for c in child]
-        else:
-            values = []
-            for c in children:
-                v = c.attrib.get("Value")
-                if v is not None:
-                    values.append(v)
-            if values:
-                return values
-    return (fld.text or "").strip()
+        return SHAPE_NESTED, nested
+    if len(children) == 1:
+        child = children[0]
+        if "Value" in child.attrib:
+            return SHAPE_VALUE, children
+        if child.tag in SF_ARRAY_TAGS:
+            return SHAPE_ARRAY, children
+    elif children:
+        return SHAPE_MULTI, children
+    return SHAPE_EMPTY, children
 
 
-def parse_object(elem, type_lookup):
+def parse_field_value(fld, type_lookup, stack):
     """
-    Recursively parse a <sf:Object> node into a Python dict.
-    
-    Changed: first look under <sf:Fields> for <sf:Field> children.
+    Return a Python representation of a <sf:Field> value.
+
+    Nested <sf:Object> nodes are returned as empty ParsedObj records and
+    pushed onto `stack` together with their element; _fill_objects()
+    parses them.
     """
-    obj_id = elem.attrib.get("Id", "")
-    type_node = elem.find("sf:Type", NS)
+    shape, children = _classify(fld)
+    # <Field><String Value=".."/></Field> etc.
+    if shape == SHAPE_VALUE:
+        return children[0].attrib["Value"]
+    if shape == SHAPE_NESTED:
+        return [_defer(n, stack) for n in children]
+    if shape == SHAPE_ARRAY:
+        array = children[0]
+        elems = (_X_ELEMENTS(array) or [None])[0]
+        if elems is not None:
+            return [_defer(o, stack) for o in _X_OBJECT(elems)]
+        return [c.attrib.get("Value", (c.text or "").strip()) for c in array]
+    if shape == SHAPE_MULTI:
+        values = []
+        for c in children:
+            v = c.attrib.get("Value")
+            if v is not None:
+                values.append(v)
+        if values:
+            return values
+    return (fld.text or "").strip()
+
+
+def _defer(elem, stack):
+    """Queue a <sf:Object> for parsing and return the ParsedObj it will fill."""
+    out = ParsedObj("", "", {}, [])
+    stack.append((elem, out))
+    return out
+
+
+def short_type_name(full_name):
+    """Drop the namespace from Spotfire type names; other names are kept whole."""
+    if full_name.startswith("Spotfire"):
+        return sys.intern(full_name.rsplit(".", 1)[-1])
+    return full_name
+
+
+def type_ids(type_lookup, short_name):
+    """Space-delimited TypeObject Ids of type `short_name`, for _HAS_TYPE."""
+    ids = [i for i, full in type_lookup.items() if short_type_name(full) == short_name]
+    # No ids must not give "  ", which would match objects without a Type
+    return " %s " % " ".join(ids) if ids else ""
+
+
+def resolve_type(elem, type_lookup):
+    """Return the type name of a <sf:Object>, shortened for Spotfire types."""
+    type_node = (_X_TYPE(elem) or [None])[0]
     obj_type = ""
     if type_node is not None:
-        ref = type_node.find("sf:TypeRef", NS)
+        ref = (_X_TYPEREF(type_node) or [None])[0]
         if ref is not None:
             ref_id = ref.attrib.get("Value")
             obj_type = type_lookup.get(ref_id, "")
         else:
-            to = type_node.find("sf:TypeObject", NS)
+            to = (_X_TYPEOBJ(type_node) or [None])[0]
             if to is not None:
                 obj_type = to.attrib.get("FullTypeName", "")
-    if obj_type.startswith("Spotfire") and "." in obj_type:
-        obj_type = obj_type.split(".")[-1]
+    return short_type_name(obj_type)
+
+
+def _fill_objects(stack, type_lookup):
+    """Parse queued (<sf:Object>, ParsedObj) pairs until the work stack is empty."""
+    while stack:
+        elem, out = stack.pop()
+        out.Id = elem.attrib.get("Id", "")
+        out.Type = resolve_type(elem, type_lookup)
+
+        fields_dict = out.Fields
+        # ─── Look inside <sf:Fields> for all <sf:Field> children ───
+        fields_container = (_X_FIELDS_CONTAINER(elem) or [None])[0]
+        if fields_container is not None:
+            for fld in _X_FIELD(fields_container):
+                name = fld.attrib.get("Name")
+                if name is not None:
+                    # The same few field names recur on every object
+                    name = sys.intern(name)
+                fields_dict[name] = parse_field_value(fld, type_lookup, stack)
+        # ────────────────────────────────────────────────────────────
+
+        # Also capture any direct child <sf:Object> (not inside <sf:Fields>)
+        out.Children = [_defer(child, stack) for child in _X_OBJECT(elem)]
+
 
-    fields_dict = {}
-    # ─── Look inside <sf:Fields> for all <sf:Field> children ───
-    fields_container = elem.find("sf:Fields", NS)
+def parse_object(elem, type_lookup):
+    """
+    Parse a <sf:Object> node, including everything nested in it, into a
+    ParsedObj.
+
+    Changed: first look under <sf:Fields> for <sf:Field> children.
+    """
+    stack = []
+    parsed = _defer(elem, stack)
+    _fill_objects(stack, type_lookup)
+    return parsed
+
+
+def parse_object_shallow(elem, type_lookup):
+    """
+    Like parse_object(), but Fields maps each field name to its raw
+    <sf:Field> element and children are not parsed.
+    Use materialize_field() to parse the fields that are actually needed.
+    """
+    fields = {}
+    fields_container = (_X_FIELDS_CONTAINER(elem) or [None])[0]
     if fields_container is not None:
-        for fld in fields_container.findall("sf:Field", NS):
-            name = fld.attrib.get("Name")
-            fields_dict[name] = parse_field_value(fld, type_lookup)
-    # ────────────────────────────────────────────────────────────
-
-    # Also capture any direct child <sf:Object> (not inside <sf:Fields>)
-    children = [parse_object(child, type_lookup) for child in elem.findall("sf:Object", NS)]
-
-    return {
-        "Id": obj_id,
-        "Type": obj_type,
-        "Fields": fields_dict,
-        "Children": children
+        for fld in _X_FIELD(fields_container):
+            fields[fld.attrib.get("Name")] = fld
+    return ParsedObj(elem.attrib.get("Id", ""), resolve_type(elem, type_lookup), fields, [])
+
+
+def materialize_field(shallow, name, type_lookup, default=""):
+    """Fully parse field `name` of a shallow-parsed object, or return `default`."""
+    fld = shallow.Fields.get(name)
+    if fld is None:
+        return default
+    stack = []
+    value = parse_field_value(fld, type_lookup, stack)
+    _fill_objects(stack, type_lookup)
+    return value
+
+
+def column_field(col, name, type_lookup):
+    """Value of field `name` of a DataColumn element, as parse_object would give it."""
+    values = _X_FIELD_VALUE(col, n=name)
+    if values:
+        return values[0]
+    flds = _X_FIELD_BY_NAME(col, n=name)
+    if not flds:
+        return ""
+    stack = []
+    value = parse_field_value(flds[0], type_lookup, stack)
+    _fill_objects(stack, type_lookup)
+    return value
+
+def strip_namespace(xml_data):
+    """
+    Return the AnalysisDocument bytes with the Spotfire namespace removed.
+
+    The namespace is normally the default namespace of <Root>, so its
+    declaration is cut out of the root start tag. Anything the byte patterns
+    miss, such as a prefixed declaration or a UTF-16 document, still shows
+    on the first parsed element and is rewritten on a parsed tree instead.
+    """
+    root_tag = _ROOT_START.search(xml_data)
+    if root_tag is not None:
+        decl = _NS_DECL.search(xml_data, root_tag.start(), root_tag.end())
+        if decl is not None:
+            view = memoryview(xml_data)
+            xml_data = b"".join((view[:decl.start()], view[decl.end():]))
+    if _root_namespace(xml_data) is not None:
+        xml_data = _strip_namespace_tree(xml_data)
+    return xml_data
+
+
+def _root_namespace(xml_data):
+    """Namespace URI of the document element, read from the first parse event."""
+    for _, root in ET.iterparse(io.BytesIO(xml_data), events=("start",), **_PARSER_OPTIONS):
+        return ET.QName(root).namespace
+    return None
+
+
+def _strip_namespace_tree(xml_data):
+    """Rename every Spotfire-namespaced element to its local name, as UTF-8 bytes."""
+    root = ET.fromstring(xml_data, ET.XMLParser(**_PARSER_OPTIONS))
+    prefix = "{%s}" % NS["sf"]
+    for el in root.iter(ET.Element):
+        if el.tag.startswith(prefix):
+            el.tag = el.tag[len(prefix):]
+    ET.cleanup_namespaces(root)
+    return ET.tostring(root, encoding="utf-8")
+
+
+def _release(elem):
+    """Free a fully handled <sf:Object> and the already-handled objects before it."""
+    elem.clear()
+    parent = elem.getparent()
+    # An object nested directly in another object follows the parent's own
+    # <sf:Type>/<sf:Fields>, which are still needed; stop at those
+    while elem.getprevious() is not None and parent[0].tag == SF_OBJECT:
+        del parent[0]
+
+
+def build_lookups(xml_file):
+    """
+    First streaming pass: return (type_lookup, string_lookup, data_type_lookup).
+    Every <sf:Object> is freed as soon as it has been looked at.
+    """
+    type_lookup = {}
+    # Lookup tables for resolving ObjectRef references
+    string_lookup = {}
+    # (Id, TypeRef Value, name) of every object that may be a DataType. The
+    # referenced TypeObject can sit in a still-open ancestor's <sf:Type>, so
+    # these are only checked once type_lookup is complete
+    data_type_candidates = []
+    for _, el in ET.iterparse(xml_file, events=("end",), tag=SF_OBJECT,
+                              **_PARSER_OPTIONS):
+        # Nested objects are already freed, so these only see the
+        # definitions that belong to this object itself
+        type_lookup.update(zip(_X_TYPE_IDS(el), _X_TYPE_NAMES(el)))
+        string_lookup.update(zip(_X_STRING_IDS(el), _X_STRING_VALUES(el)))
+        string_lookup.update(dict.fromkeys(_X_EMPTY_STRING_IDS(el), ""))
+
+        ref = el.find("Type/TypeRef")
+        if ref is not None:
+            name_f = el.find("Fields/Field[@Name='name']/String")
+            if name_f is not None:
+                data_type_candidates.append(
+                    (el.attrib.get("Id"), ref.attrib.get("Value"), name_f.attrib.get("Value", ""))
+                )
+        _release(el)
+    data_type_lookup = {
+        obj_id: name
+        for obj_id, ref_id, name in data_type_candidates
+        if type_lookup.get(ref_id, "").endswith("DataType")
+    }
+    return type_lookup, string_lookup, data_type_lookup
+
+
+def build_lookups_pugixml(xml_data):
+    """
+    build_lookups() on a pugixml DOM (PARSE_BACKEND=pugixml).
+    pugixml loads the whole document but parses it several times faster
+    than the streaming lxml pass; the lookups are read with its C++ XPath.
+    """
+    import pygixml
+
+    try:
+        doc = pygixml.parse_string(xml_data.decode("utf-8"))
+    except (pygixml.PygiXMLError, UnicodeDecodeError) as e:
+        raise ET.XMLSyntaxError(str(e), 0, 0, 0)
+    # Nodes point into `doc`, which must stay referenced while they are used
+    root = doc.root
+
+    type_lookup = {}
+    for hit in root.select_nodes("//TypeObject[@Id]"):
+        to = hit.node
+        type_lookup[to.attribute("Id").value] = to.attribute("FullTypeName").value or ""
+    # Lookup tables for resolving ObjectRef references
+    string_lookup = {}
+    for hit in root.select_nodes("//String[@Id]"):
+        s = hit.node
+        string_lookup[s.attribute("Id").value] = s.attribute("Value").value or ""
+    data_type_lookup = {}
+    for hit in root.select_nodes("//Object[Type/TypeRef]"):
+        o = hit.node
+        ref_id = o.select_node("Type/TypeRef").node.attribute("Value").value
+        if type_lookup.get(ref_id, "").endswith("DataType"):
+            name_f = o.select_node("Fields/Field[@Name='name']/String").node
+            if not name_f.is_null():
+                data_type_lookup[o.attribute("Id").value] = name_f.attribute("Value").value or ""
+    return type_lookup, string_lookup, data_type_lookup
+
+
+def handler_for_object(elem, type_lookup, handler_cache):
+    """
+    handler_for_type() of a <sf:Object>, memoized in `handler_cache` by type
+    Id. Most objects share a handful of types, so this is usually one dict hit.
+    """
+    type_id = _X_TYPE_ID(elem)
+    handler = handler_cache.get(type_id, False)
+    if handler is False:
+        handler = handler_cache[type_id] = handler_for_type(
+            short_type_name(type_lookup.get(type_id, ""))
+        )
+    return handler
+
+
+def iter_model_objects(xml_file, type_lookup):
+    """
+    Second streaming pass: yield (element, handler) for every <sf:Object>
+    that belongs in the IM, in document order.
+
+    An IM object is yielded, together with the IM objects nested in it, once
+    its end tag is seen and no enclosing object is itself an IM object. The
+    subtree is freed when the caller resumes, so only the object currently
+    being handled (plus its open ancestors) is kept in memory.
+    """
+    # [element, handler] for every open <sf:Object>. handler is False until
+    # resolved; <sf:Type> precedes nested objects, so it is complete by then.
+    open_objects = []
+    handler_cache = {}
+    for event, el in ET.iterparse(xml_file, events=("start", "end"), tag=SF_OBJECT,
+                                  **_PARSER_OPTIONS):
+        if event == "start":
+            open_objects.append([el, False])
+            continue
+        open_objects.pop()
+        for entry in open_objects:
+            if entry[1] is False:
+                entry[1] = handler_for_object(entry[0], type_lookup, handler_cache)
+            if entry[1] is not None:
+                break
+        else:
+            handler = handler_for_object(el, type_lookup, handler_cache)
+            if handler is not None:
+                yield el, handler
+                for o in el.iterdescendants(SF_OBJECT):
+                    nested = handler_for_object(o, type_lookup, handler_cache)
+                    if nested is not None:
+                        yield o, nested
+            _release(el)
+
+
+@dataclass
+class Lookups:
+    """Per-document tables the section handlers resolve references with."""
+    type_lookup: dict
+    string_lookup: dict
+    data_type_lookup: dict
+    # space-delimited TypeObject Ids for _X_DATACOLUMNS
+    column_ids: str
+    collection_ids: str
+
+
+# (3) Object types collected into the intermediate model. Each handler adds
+# one <sf:Object> element to its IM section. Filters and Bookmarks are
+# emitted whole; the other sections only need a handful of fields, which are
+# parsed on demand.
+
+def _resolve(v, string_lookup, data_type_lookup=None):
+    """
+    Coerce a column field value: string references go through the lookups,
+    a DataType-style object (or a list headed by one) becomes its name.
+    """
+    t = type(v)
+    if t is str:
+        if data_type_lookup is not None:
+            return data_type_lookup.get(v, string_lookup.get(v, v))
+        return string_lookup.get(v, v)
+    if t is ParsedObj:
+        return v.Fields.get("name", "")
+    if t is list and v and type(v[0]) is ParsedObj:
+        return v[0].Fields.get("name", "")
+    return v
+
+
+def _handle_datatable(obj, im, lk):
+    """1. DataTable"""
+    parsed = parse_object_shallow(obj, lk.type_lookup)
+    dt = {
+        "Id": parsed.Id,
+        "Name": materialize_field(parsed, "Name", lk.type_lookup),
+        "DataSource": materialize_field(parsed, "DataSource", lk.type_lookup),
+        "Transformations": [],
+        "Columns": [],
+        "Relationships": []
+    }
+    # Collect Transformations (each one is itself an <Object>)
+    for trans in materialize_field(parsed, "Transformations", lk.type_lookup, []):
+        dt["Transformations"].append({
+            "Type": trans.Type,
+            **trans.Fields
+        })
+    # Collect Columns
+    for col in _X_DATACOLUMNS(obj, column_ids=lk.column_ids, collection_ids=lk.collection_ids):
+        name = _resolve(column_field(col, "Name", lk.type_lookup), lk.string_lookup)
+        dtype = _resolve(column_field(col, "DataType", lk.type_lookup),
+                         lk.string_lookup, lk.data_type_lookup)
+        expr = _resolve(column_field(col, "Expression", lk.type_lookup), lk.string_lookup)
+        dt["Columns"].append({"Name": name, "DataType": dtype, "Expression": expr})
+    # Collect Relations
+    for rel in materialize_field(parsed, "Relations", lk.type_lookup, []):
+        dt["Relationships"].append({
+            "Type": rel.Type,
+            **rel.Fields
+        })
+    im["DataTables"].append(dt)
+
+
+def _handle_viz(obj, im, lk):
+    """2. Visualizations (common types)"""
+    parsed = parse_object_shallow(obj, lk.type_lookup)
+    viz = {
+        "Id": parsed.Id,
+        "Type": parsed.Type,
+        "DataTable": materialize_field(parsed, "Data", lk.type_lookup),
+        "Bindings": {},
+        "Filters": materialize_field(parsed, "Filters", lk.type_lookup),
+        "Formatting": materialize_field(parsed, "Format", lk.type_lookup)
     }
+    # Common binding fields (adjust as needed)
+    for bf in ["XAxisColumn", "YAxisColumn", "ColorBy", "CategoryField", "ValueField", "Legend"]:
+        if bf in parsed.Fields:
+            viz["Bindings"][bf] = materialize_field(parsed, bf, lk.type_lookup)
+    im["Visualizations"].append(viz)
+
+
+def _handle_filter(obj, im, lk):
+    """3. FilteringScheme or Filter"""
+    im["Filters"].append(parse_object(obj, lk.type_lookup))
+
+
+def _handle_bookmark(obj, im, lk):
+    """4. Bookmark"""
+    im["Bookmarks"].append(parse_object(obj, lk.type_lookup))
+
+
+def _handle_script(obj, im, lk):
+    """5. Script / DataFunction"""
+    parsed = parse_object_shallow(obj, lk.type_lookup)
+    im["Scripts"].append({
+        "Id": parsed.Id,
+        "Type": parsed.Type,
+        "Content": materialize_field(
+            parsed, "Script", lk.type_lookup,
+            materialize_field(parsed, "Expression", lk.type_lookup)
+        )
+    })
+
+
+# Type name suffix -> handler, tried in order, so "DataTable" wins over "Table"
+_SUFFIX_DISPATCH = (
+    ("DataTable", _handle_datatable),
+    ("BarChart", _handle_viz),
+    ("LineChart", _handle_viz),
+    ("Table", _handle_viz),
+    ("ScatterChart", _handle_viz),
+    ("PieChart", _handle_viz),
+)
+# Exact type name -> handler
+_DISPATCH = {
+    "FilteringScheme": _handle_filter,
+    "Filter": _handle_filter,
+    "Bookmark": _handle_bookmark,
+    "Script": _handle_script,
+    "DataFunction": _handle_script,
+}
 
-def build_intermediate_model(xml_root):
+
+def handler_for_type(t):
+    """
+    Return the IM handler for objects of (short) type `t`, or None.
+    DataTables and visualizations match on the name suffix, so subtypes such
+    as SummaryTable are included; the other sections match exactly.
+    """
+    for suffix, handler in _SUFFIX_DISPATCH:
+        if t.endswith(suffix):
+            return handler
+    return _DISPATCH.get(t)
+
+
+def build_intermediate_model(xml_data):
     """
-    Walk the AnalysisDocument root and collect:
+    Stream the AnalysisDocument XML (bytes, after strip_namespace) and collect:
     - DataTables
     - Visualizations (BarChart, LineChart, etc.)
     - Filters / FilteringSchemes
@@ -99,162 +602,67 @@ def build_intermediate_model(xml_root):
         "Scripts": []
     }
 
-    type_lookup = {
-        to.attrib.get("Id"): to.attrib.get("FullTypeName", "")
-        for to in xml_root.findall(".//sf:TypeObject", NS)
-    }
-    # Lookup tables for resolving ObjectRef references
-    string_lookup = {
-        s.attrib.get("Id"): s.attrib.get("Value", "")
-        for s in xml_root.findall(".//sf:String", NS)
-    }
-    data_type_lookup = {}
-    for o in xml_root.findall(".//sf:Object", NS):
-        ref = o.find("sf:Type/sf:TypeRef", NS)
-        if ref is not None and type_lookup.get(ref.attrib.get("Value"), "").endswith("DataType"):
-            name_f = o.find("sf:Fields/sf:Field[@Name='name']/sf:String", NS)
-            if name_f is not None:
-                data_type_lookup[o.attrib.get("Id")] = name_f.attrib.get("Value", "")
-
-    for obj in xml_root.findall(".//sf:Object", NS):
-        parsed = parse_object(obj, type_lookup)
-        t = parsed["Type"]
-
-        # 1. DataTable
-        if t.endswith("DataTable"):
-            dt = {
-                "Id": parsed["Id"],
-                "Name": parsed["Fields"].get("Name", ""),
-                "DataSource": parsed["Fields"].get("DataSource", ""),
-                "Transformations": [],
-                "Columns": [],
-                "Relationships": []
-            }
-            # Collect Transformations (each one is itself an <Object>)
-            for trans in parsed["Fields"].get("Transformations", []):
-                dt["Transformations"].append({
-                    "Type": trans.get("Type", ""),
-                    **trans.get("Fields", {})
-                })
-            # Collect Columns
-            cols_field = parsed["Fields"].get("Columns", [])
-            for col in cols_field:
-                # Older behavior: direct DataColumn objects
-                if col.get("Type") == "DataColumn":
-                    fields = col.get("Fields", {})
-                    name = fields.get("Name", "")
-                    if isinstance(name, str):
-                        name = string_lookup.get(name, name)
-                    dtype = fields.get("DataType", "")
-                    if isinstance(dtype, str):
-                        dtype = data_type_lookup.get(dtype, string_lookup.get(dtype, dtype))
-                    elif isinstance(dtype, dict):
-                        dtype = dtype.get("Fields", {}).get("name", "")
-                    elif isinstance(dtype, list) and dtype and isinstance(dtype[0], dict):
-                        dtype = dtype[0].get("Fields", {}).get("name", "")
-                    expr = fields.get("Expression", "")
-                    if isinstance(expr, str):
-                        expr = string_lookup.get(expr, expr)
-                    dt["Columns"].append({"Name": name, "DataType": dtype, "Expression": expr})
-                # Newer format: a DataColumnCollection with Items -> Nodes
-                elif col.get("Type") == "DataColumnCollection":
-                    for item in col.get("Fields", {}).get("Items", []):
-                        nodes = item.get("Fields", {}).get("Nodes", [])
-                        for node in nodes:
-                            if not isinstance(node, dict):
-                                continue
-                            fields = node.get("Fields", {})
-                            name = fields.get("Name", "")
-                            if isinstance(name, str):
-                                name = string_lookup.get(name, name)
-                            dtype = fields.get("DataType", "")
-                            if isinstance(dtype, str):
-                                dtype = data_type_lookup.get(dtype, string_lookup.get(dtype, dtype))
-                            elif isinstance(dtype, dict):
-                                dtype = dtype.get("Fields", {}).get("name", "")
-                            elif isinstance(dtype, list) and dtype and isinstance(dtype[0], dict):
-                                dtype = dtype[0].get("Fields", {}).get("name", "")
-                            expr = fields.get("Expression", "")
-                            if isinstance(expr, str):
-                                expr = string_lookup.get(expr, expr)
-                            dt["Columns"].append({"Name": name, "DataType": dtype, "Expression": expr})
-            # Collect Relations
-            for rel in parsed["Fields"].get("Relations", []):
-                dt["Relationships"].append({
-                    "Type": rel.get("Type", ""),
-                    **rel.get("Fields", {})
-                })
-            im["DataTables"].append(dt)
-
-        # 2. Visualizations (common types)
-        elif any(t.endswith(v) for v in ["BarChart", "LineChart", "Table", "ScatterChart", "PieChart"]):
-            viz = {
-                "Id": parsed["Id"],
-                "Type": t,
-                "DataTable": parsed["Fields"].get("Data", ""),
-                "Bindings": {},
-                "Filters": parsed["Fields"].get("Filters", ""),
-                "Formatting": parsed["Fields"].get("Format", "")
-            }
-            # Common binding fields (adjust as needed)
-            for bf in ["XAxisColumn", "YAxisColumn", "ColorBy", "CategoryField", "ValueField", "Legend"]:
-                if bf in parsed["Fields"]:
-                    viz["Bindings"][bf] = parsed["Fields"][bf]
-            im["Visualizations"].append(viz)
-
-        # 3. FilteringScheme or Filter
-        elif t in ["FilteringScheme", "Filter"]:
-            im["Filters"].append(parsed)
-
-        # 4. Bookmark
-        elif t == "Bookmark":
-            im["Bookmarks"].append(parsed)
-
-        # 5. Script / DataFunction
-        elif t in ["Script", "DataFunction"]:
-            im["Scripts"].append({
-                "Id": parsed["Id"],
-                "Type": t,
-                "Content": parsed["Fields"].get("Script", parsed["Fields"].get("Expression", ""))
-            })
+    if PARSE_BACKEND == "pugixml":
+        type_lookup, string_lookup, data_type_lookup = build_lookups_pugixml(xml_data)
+    else:
+        type_lookup, string_lookup, data_type_lookup = build_lookups(io.BytesIO(xml_data))
+    lk = Lookups(
+        type_lookup, string_lookup, data_type_lookup,
+        column_ids=type_ids(type_lookup, "DataColumn"),
+        collection_ids=type_ids(type_lookup, "DataColumnCollection"),
+    )
+
+    for obj, handler in iter_model_objects(io.BytesIO(xml_data), type_lookup):
+        handler(obj, im, lk)
 
     return im
 
 def process_dxp(dxp_path, output_dir):
-    """Unzip .dxp, locate AnalysisDocument.xml, build IM, write JSON."""
+    """Read AnalysisDocument.xml from the .dxp, build IM, write JSON."""
     base_name = os.path.splitext(os.path.basename(dxp_path))[0]
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Unzip into tmpdir
-        with zipfile.ZipFile(dxp_path, "r") as z:
-            z.extractall(tmpdir)
-
-        xml_file = os.path.join(tmpdir, "AnalysisDocument.xml")
-        if not os.path.isfile(xml_file):
+    # Only AnalysisDocument.xml is needed, so read it straight from the
+    # archive instead of extracting every embedded resource to disk
+    with zipfile.ZipFile(dxp_path, "r") as z:
+        try:
+            xml_data = z.read("AnalysisDocument.xml")
+        except KeyError:
             print(f"⚠️  Skipping {dxp_path}: AnalysisDocument.xml not found.")
             return
 
-        # Parse XML
-        try:
-            tree = ET.parse(xml_file)
-        except ET.XMLSyntaxError as e:
-            print(f"⚠️  Skipping {dxp_path}: XML syntax error: {e}")
-            return
-        root = tree.getroot()
-        im = build_intermediate_model(root)
+    # Parse XML
+    try:
+        # Rebinding lets the unstripped copy be freed before the build
+        xml_data = strip_namespace(xml_data)
+        im = build_intermediate_model(xml_data)
+    except ET.XMLSyntaxError as e:
+        print(f"⚠️  Skipping {dxp_path}: XML syntax error: {e}")
+        return
 
-        # Write JSON
-        out_path = os.path.join(output_dir, f"{base_name}_IM.json")
+    # Write JSON
+    out_path = os.path.join(output_dir, f"{base_name}_IM.json")
+    if orjson is not None:
+        with open(out_path, "wb") as fp:
+            # OPT_NON_STR_KEYS: a <sf:Field> without Name is keyed None, which
+            # json writes as "null"
+            fp.write(orjson.dumps(im, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
         with open(out_path, "w", encoding="utf-8") as fp:
-            json.dump(im, fp, indent=2)
-        print(f"✅  Parsed {dxp_path} → {out_path}")
+            json.dump(im, fp, indent=2, default=_json_default)
+    print(f"✅  Parsed {dxp_path} → {out_path}")
 
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for fname in os.listdir(INPUT_DIR):
-        if fname.lower().endswith(".dxp"):
-            full = os.path.join(INPUT_DIR, fname)
-            process_dxp(full, OUTPUT_DIR)
+    paths = [
+        os.path.join(INPUT_DIR, fname)
+        for fname in os.listdir(INPUT_DIR)
+        if fname.lower().endswith(".dxp")
+    ]
+    # Each .dxp is independent and parsing is CPU-bound, so use processes by
+    # default; threads skip worker start-up, which dominates on small batches
+    executor = ThreadPoolExecutor if PARSE_EXECUTOR == "thread" else ProcessPoolExecutor
+    with executor(max_workers=os.cpu_count()) as ex:
+        list(ex.map(partial(process_dxp, output_dir=OUTPUT_DIR), paths))
 
 if __name__ == "__main__":
     main()